@@ -1,20 +1,70 @@
 import streamlit as st
 import sqlite3
+import asyncio
+import hashlib
+import hmac
+import itertools
+import json
 import os
-import tempfile
+import queue
+import threading
 from datetime import datetime
 from dotenv import load_dotenv
-from openai import OpenAI
+from openai import AsyncOpenAI
 import pandas as pd
 
 # ---------- CONFIG ----------
-load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+@st.cache_resource
+def get_client():
+    load_dotenv()
+    return AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+def get_admin_hash():
+    # Not cached: only runs on a Verify click, and an ADMIN_PASSWORD added to .env
+    # later must take effect without a restart. Unset means delete-all is disabled.
+    load_dotenv()
+    password = os.getenv("ADMIN_PASSWORD")
+    return hashlib.sha256(password.encode()).digest() if password else None
+
 DB_NAME = "reviews.db"
 
 # ---------- DATABASE ----------
+@st.cache_resource
+def get_conn():
+    conn = sqlite3.connect(DB_NAME, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA busy_timeout=5000")
+    conn.execute("PRAGMA cache_size=-20000")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    return conn
+
+@st.cache_resource
+def _db_lock():
+    # Every session thread shares get_conn(), and its transaction state with it,
+    # so all reads and writes on the connection are serialized through this lock
+    return threading.Lock()
+
+@st.cache_resource
+def _rev_state():
+    # Shared by all sessions so one user's write invalidates everyone's cache
+    return {"version": 0, "counter": itertools.count(1)}
+
+def _bump_rev_version():
+    # next() on itertools.count is atomic, so concurrent writers never share a version
+    state = _rev_state()
+    state["version"] = next(state["counter"])
+
+REVIEW_COLUMNS = {
+    "english_text": "TEXT",
+    "telugu_text": "TEXT",
+    "ai_review": "TEXT",
+    "timestamp": "TEXT",
+}
+
 def init_db():
-    with sqlite3.connect(DB_NAME) as conn:
+    conn = get_conn()
+    with _db_lock():
         conn.execute("""
             CREATE TABLE IF NOT EXISTS reviews (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -22,19 +72,29 @@ def init_db():
             )
         """)
 
-        cols = [row[1] for row in conn.execute("PRAGMA table_info(reviews)")]
+        cols = {row[1] for row in conn.execute("PRAGMA table_info(reviews)")}
+        missing = {c: t for c, t in REVIEW_COLUMNS.items() if c not in cols}
+
+        # Add all missing columns in a single transaction (one journal write)
+        if missing:
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                for c, t in missing.items():
+                    conn.execute(f"ALTER TABLE reviews ADD COLUMN {c} {t}")
+
+        # id is the rowid, so ORDER BY id DESC already walks the table B-tree;
+        # drop the redundant index created by earlier versions
+        conn.execute("DROP INDEX IF EXISTS idx_reviews_id_desc")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_reviews_rating ON reviews(rating)")
 
-        if "english_text" not in cols:
-            conn.execute("ALTER TABLE reviews ADD COLUMN english_text TEXT")
-        if "telugu_text" not in cols:
-            conn.execute("ALTER TABLE reviews ADD COLUMN telugu_text TEXT")
-        if "ai_review" not in cols:
-            conn.execute("ALTER TABLE reviews ADD COLUMN ai_review TEXT")
-        if "timestamp" not in cols:
-            conn.execute("ALTER TABLE reviews ADD COLUMN timestamp TEXT")
+@st.cache_resource
+def ensure_schema():
+    init_db()
+    return True
 
 def save_review(rating, english, telugu, ai_review):
-    with sqlite3.connect(DB_NAME) as conn:
+    conn = get_conn()
+    with _db_lock(), conn:
         conn.execute("""
             INSERT INTO reviews (rating, english_text, telugu_text, ai_review, timestamp)
             VALUES (?, ?, ?, ?, ?)
@@ -45,88 +105,179 @@ def save_review(rating, english, telugu, ai_review):
             ai_review,
             datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         ))
+    _bump_rev_version()
 
-def get_reviews():
-    with sqlite3.connect(DB_NAME) as conn:
+# Older versions are never read again, so keep only the newest few entries
+@st.cache_data(max_entries=16)
+def _get_reviews(version, limit, offset):
+    conn = get_conn()
+    with _db_lock():
         return conn.execute("""
             SELECT id, rating, english_text, telugu_text, ai_review, timestamp
             FROM reviews
             ORDER BY id DESC
-        """).fetchall()
-
-def delete_review(review_id):
-    with sqlite3.connect(DB_NAME) as conn:
-        conn.execute("DELETE FROM reviews WHERE id = ?", (review_id,))
+            LIMIT ? OFFSET ?
+        """, (limit, offset)).fetchall()
+
+def get_reviews(limit=20, offset=0):
+    return _get_reviews(_rev_state()["version"], limit, offset)
+
+def get_review_texts():
+    """Every review's rating and English text as one "Rating: ..., Review: ..." block"""
+    # Row factory is set per cursor so the cached (pickled) queries keep plain tuples
+    with _db_lock():
+        cursor = get_conn().cursor()
+        cursor.row_factory = sqlite3.Row
+        rows = cursor.execute("""
+            SELECT rating, english_text
+            FROM reviews
+            ORDER BY id DESC
+        """)
+        return "\n".join(
+            f"Rating: {r['rating']}, Review: {r['english_text']}"
+            for r in rows if r["english_text"]
+        )
+
+@st.cache_data(max_entries=4)
+def _count_reviews(version):
+    conn = get_conn()
+    with _db_lock():
+        return conn.execute("SELECT COUNT(*) FROM reviews").fetchone()[0]
+
+def count_reviews():
+    return _count_reviews(_rev_state()["version"])
+
+@st.cache_data(max_entries=4)
+def _get_rating_counts(version):
+    conn = get_conn()
+    with _db_lock():
+        return dict(conn.execute("SELECT rating, COUNT(*) FROM reviews GROUP BY rating").fetchall())
+
+def get_rating_counts():
+    return _get_rating_counts(_rev_state()["version"])
+
+def delete_reviews(review_ids):
+    if not review_ids:
+        return
+    conn = get_conn()
+    with _db_lock(), conn:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.executemany("DELETE FROM reviews WHERE id = ?", [(int(i),) for i in review_ids])
+    _bump_rev_version()
 
 def delete_all_reviews():
-    with sqlite3.connect(DB_NAME) as conn:
+    conn = get_conn()
+    with _db_lock(), conn:
         conn.execute("DELETE FROM reviews")
+    _bump_rev_version()
 
 # ---------- AI ----------
-def transcribe_audio(audio):
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp:
-        tmp.write(audio.read())
-        path = tmp.name
+@st.cache_resource
+def _event_loop():
+    # The cached AsyncOpenAI client pools connections on the loop that opened them,
+    # so every coroutine runs on one long-lived loop instead of a fresh asyncio.run()
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return loop
+
+# Coroutines take the client as an argument: get_client() is a Streamlit cache and
+# must be called on the script thread, not on the loop thread (no ScriptRunContext)
+def submit_async(coro):
+    return asyncio.run_coroutine_threadsafe(coro, _event_loop())
+
+def run_async(coro):
+    return submit_async(coro).result()
+
+# System messages are built once and reused across calls
+_TELUGU_SYS = {"role": "system", "content": "Translate the following into Telugu."}
+_TRANSLATE_CLEAN_SYS = {
+    "role": "system",
+    "content": (
+        "Translate the following food review into English, then rewrite it "
+        "into polite, simple, respectful feedback for public display. "
+        "Return JSON: {\"english\": <faithful English translation>, "
+        "\"polite\": <polite public-display rewrite>}."
+    )
+}
+_ANALYZE_SYS = {
+    "role": "system",
+    "content": (
+        "Analyze the following food reviews and identify the most common issues, "
+        "complaints, or problems mentioned across all reviews. "
+        "Provide a concise summary of 3-5 key issues. "
+        "Focus on actionable feedback like taste, quality, service, temperature, etc."
+    )
+}
 
-    result = client.audio.transcriptions.create(
-        file=open(path, "rb"),
+async def transcribe_audio(client, audio):
+    data = audio.getvalue() if hasattr(audio, "getvalue") else audio.read()
+    result = await client.audio.transcriptions.create(
+        file=("audio.wav", data, "audio/wav"),
         model="gpt-4o-transcribe"
     )
     return result.text
 
-def translate(text, language):
-    response = client.chat.completions.create(
+def stream_telugu(text):
+    """Yield the Telugu translation token by token as the model produces it"""
+    client = get_client()
+    chunks = queue.Queue()
+
+    async def pump():
+        try:
+            stream = await client.chat.completions.create(
+                model="gpt-4o-mini",
+                messages=[_TELUGU_SYS, {"role": "user", "content": text}],
+                stream=True
+            )
+            async for chunk in stream:
+                if chunk.choices:
+                    chunks.put(chunk.choices[0].delta.content or "")
+        finally:
+            chunks.put(None)
+
+    future = submit_async(pump())
+    while True:
+        piece = chunks.get()
+        if piece is None:
+            break
+        yield piece
+    future.result()  # re-raise any API error from the loop thread
+
+async def translate_and_clean(client, text):
+    """Translate to English and write the polite public version in one call"""
+    response = await client.chat.completions.create(
         model="gpt-4o-mini",
-        messages=[
-            {"role": "system", "content": f"Translate the following into {language}."},
-            {"role": "user", "content": text}
-        ]
+        response_format={"type": "json_object"},
+        messages=[_TRANSLATE_CLEAN_SYS, {"role": "user", "content": text}]
     )
-    return response.choices[0].message.content
-
-def clean_review(english_text):
-    response = client.chat.completions.create(
+    choice = response.choices[0]
+    if choice.finish_reason == "length":
+        raise ValueError("translation response was truncated")
+    result = json.loads(choice.message.content)  # JSONDecodeError is a ValueError
+    english, polite = result.get("english"), result.get("polite")
+    if not isinstance(english, str) or not isinstance(polite, str):
+        raise ValueError("translation response is missing english/polite text")
+    return english, polite
+
+async def _request_analysis(client, all_reviews):
+    response = await client.chat.completions.create(
         model="gpt-4o-mini",
-        messages=[
-            {
-                "role": "system",
-                "content": (
-                    "Rewrite this food review into polite, simple, respectful feedback "
-                    "for public display."
-                )
-            },
-            {"role": "user", "content": english_text}
-        ]
+        messages=[_ANALYZE_SYS, {"role": "user", "content": f"Reviews:\n{all_reviews}"}]
     )
     return response.choices[0].message.content
 
-def analyze_common_issues(reviews_data):
+@st.cache_data(show_spinner=False, max_entries=8)
+def _analyze(fingerprint, _payload):
+    # Keyed on the fingerprint only; the leading underscore stops Streamlit hashing the payload
+    return run_async(_request_analysis(get_client(), _payload))
+
+def analyze_common_issues(all_reviews):
     """Analyze reviews to identify common issues"""
-    if not reviews_data:
-        return "No reviews available for analysis."
-    
-    # Combine all review texts
-    all_reviews = "\n".join([f"Rating: {r[1]}, Review: {r[2]}" for r in reviews_data if r[2]])
-    
     if not all_reviews.strip():
         return "No review text available for analysis."
     
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[
-            {
-                "role": "system",
-                "content": (
-                    "Analyze the following food reviews and identify the most common issues, "
-                    "complaints, or problems mentioned across all reviews. "
-                    "Provide a concise summary of 3-5 key issues. "
-                    "Focus on actionable feedback like taste, quality, service, temperature, etc."
-                )
-            },
-            {"role": "user", "content": f"Reviews:\n{all_reviews}"}
-        ]
-    )
-    return response.choices[0].message.content
+    fingerprint = hashlib.sha1(all_reviews.encode()).hexdigest()
+    return _analyze(fingerprint, all_reviews)
 
 # ---------- UI ----------
 st.set_page_config(
@@ -175,7 +326,7 @@ button[key*="rate_2"]:hover {
 
 st.title("GBRDS Food Review")
 
-init_db()
+ensure_schema()
 
 # ---------- RATING BUTTONS ----------
 st.subheader("🍽️ How was your food? / మీ ఆహారం ఎలా ఉంది?")
@@ -188,6 +339,8 @@ ratings = [
     {"label_en": "Okay", "label_te": "సరాసరి", "color": "orange", "emoji": "😐", "value": "okay"},
     {"label_en": "Not Tasty", "label_te": "రుచికాదు", "color": "red", "emoji": "🤢", "value": "not_tasty"}
 ]
+RATINGS_BY_VALUE = {r["value"]: r for r in ratings}
+RATING_LABELS = {r["value"]: f"{r['emoji']} {r['value']}" for r in ratings}
 
 cols = st.columns(3)
 for i, r in enumerate(ratings):
@@ -196,7 +349,7 @@ for i, r in enumerate(ratings):
         st.rerun()
 
 if st.session_state.rating:
-    selected = next((r for r in ratings if r["value"] == st.session_state.rating), None)
+    selected = RATINGS_BY_VALUE.get(st.session_state.rating)
     if selected:
         st.markdown(f"""
 ### Your Rating: 
@@ -209,16 +362,28 @@ st.subheader("🎤 Speak Your Review / మీ సమీక్షను చెప
 audio = st.audio_input("Press record, speak, then stop / రికార్డ్ నొక్కండి, మాట్లాడండి, ఆపండి")
 
 if audio and st.session_state.rating:
-    if "last_audio" not in st.session_state or audio != st.session_state.last_audio:
-        st.session_state.last_audio = audio
-
-        with st.spinner("Listening, translating, and saving..."):
-            raw = transcribe_audio(audio)
-            english = translate(raw, "English")
-            telugu = translate(raw, "Telugu")
-            ai_review = clean_review(english)
-
-            save_review(st.session_state.rating, english, telugu, ai_review)
+    audio_hash = hashlib.blake2b(audio.getvalue(), digest_size=16).hexdigest()
+    if st.session_state.get("last_audio_hash") != audio_hash:
+        st.session_state.last_audio_hash = audio_hash
+
+        english_future = None
+        try:
+            with st.spinner("Listening, translating, and saving..."):
+                client = get_client()
+                raw = run_async(transcribe_audio(client, audio))
+                # English + cleanup runs in the background while Telugu streams to the page
+                english_future = submit_async(translate_and_clean(client, raw))
+                telugu = st.write_stream(stream_telugu(raw))
+                english, ai_review = english_future.result()
+
+                save_review(st.session_state.rating, english, telugu, ai_review)
+        except Exception:
+            if english_future is not None:
+                english_future.cancel()
+            # Forget this recording so the user can submit it again
+            st.session_state.pop("last_audio_hash", None)
+            st.error("❌ Could not process the review, please try again. / సమీక్షను ప్రాసెస్ చేయలేకపోయాము, దయచేసి మళ్లీ ప్రయత్నించండి.")
+            st.stop()
 
         st.success("✅ Review saved! / సమీక్ష సేవ్ చేయబడింది!")
         st.session_state.rating = None
@@ -246,7 +411,11 @@ if st.session_state.confirm_delete_all:
             st.session_state.password_entered = False
             st.rerun()
         if c2.button("✅ Verify / ధృవీకరించండి", key="verify_password"):
-            if password == "121212":
+            password_hash = hashlib.sha256(password.encode()).digest()
+            admin_hash = get_admin_hash()
+            if admin_hash is None:
+                st.error("❌ ADMIN_PASSWORD is not configured, delete-all is disabled. / ADMIN_PASSWORD సెట్ చేయబడలేదు, అన్నింటినీ తొలగించడం నిలిపివేయబడింది.")
+            elif hmac.compare_digest(password_hash, admin_hash):
                 st.session_state.password_entered = True
                 st.rerun()
             else:
@@ -288,15 +457,10 @@ else:
         st.session_state.dashboard_verified = False
         st.rerun()
     
-    reviews_data = get_reviews()
-
-    if reviews_data:
+    if count_reviews():
         # Calculate rating distribution
-        rating_counts = {"tasty": 0, "okay": 0, "not_tasty": 0}
-        for review in reviews_data:
-            rating = review[1]  # rating is at index 1
-            if rating in rating_counts:
-                rating_counts[rating] += 1
+        counts = get_rating_counts()
+        rating_counts = {k: counts.get(k, 0) for k in ("tasty", "okay", "not_tasty")}
         
         # Display distribution
         col1, col2, col3 = st.columns(3)
@@ -335,7 +499,7 @@ else:
         
         if st.button("🔄 Analyze Reviews / సమీక్షలను విశ్లేషించండి", key="analyze_btn"):
             with st.spinner("Analyzing reviews for common issues... / సాధారణ సమస్యల కోసం సమీక్షలను విశ్లేషిస్తోంది..."):
-                common_issues = analyze_common_issues(reviews_data)
+                common_issues = analyze_common_issues(get_review_texts())
                 st.session_state.common_issues = common_issues
                 st.rerun()
         
@@ -349,40 +513,71 @@ else:
 # ---------- SHOW REVIEWS ----------
 st.subheader("🗣️ Reviews / సమీక్షలు")
 
-for rid, rating, en, te, review, time in get_reviews():
-    selected = next((r for r in ratings if r['value'] == rating), None)
-    color = selected['color'] if selected else "black"
-    emoji = selected['emoji'] if selected else ""
-    st.markdown(f"""
-**<span style='color:{color}; font-size:22px'>{emoji} {rating}</span>**  
-🕒 *{time}*  
-
-🇺🇸 **English / ఆంగ్లం:** {en}  
-
-🇮🇳 **Telugu / తెలుగు:** {te}
-""", unsafe_allow_html=True)
-
-    # ---- Delete single review ----
-    key_base = f"del_{rid}"
-
-    if key_base not in st.session_state:
-        st.session_state[key_base] = False
-
-    if st.button("🗑️ Delete This Review / ఈ సమీక్షను తొలగించండి", key=f"{key_base}_btn"):
-        st.session_state[key_base] = True
+PAGE_SIZE = 20
+total_pages = max(1, -(-count_reviews() // PAGE_SIZE))
+# Deleting reviews can shrink the page count below the current page
+if st.session_state.get("reviews_page", 1) > total_pages:
+    st.session_state.reviews_page = total_pages
+page = st.number_input(
+    f"Page / పేజీ (1-{total_pages})",
+    min_value=1,
+    max_value=total_pages,
+    step=1,
+    key="reviews_page"
+)
 
-    if st.session_state[key_base]:
-        st.warning("Are you sure you want to delete this review? / మీరు నిజంగా ఈ సమీక్షను తొలగించాలనుకుంటున్నారా?")
+reviews_page = get_reviews(PAGE_SIZE, (page - 1) * PAGE_SIZE)
+
+if reviews_page:
+    df = pd.DataFrame(
+        reviews_page,
+        columns=["id", "rating", "english", "telugu", "ai_review", "time"]
+    ).set_index("id")
+    df["rating"] = df["rating"].map(RATING_LABELS).fillna(df["rating"])
+    df.insert(0, "delete", False)
+
+    # One editor for the whole page instead of markdown + buttons per review
+    edited = st.data_editor(
+        df[["delete", "rating", "time", "english", "telugu"]],
+        column_config={
+            "delete": st.column_config.CheckboxColumn("🗑️"),
+            "rating": "Rating / రేటింగ్",
+            "time": "🕒",
+            "english": "🇺🇸 English / ఆంగ్లం",
+            "telugu": "🇮🇳 Telugu / తెలుగు",
+        },
+        disabled=["rating", "time", "english", "telugu"],
+        hide_index=True,
+        width="stretch",
+        key=f"reviews_editor_{page}_{_rev_state()['version']}"
+    )
+    selected_ids = edited.index[edited["delete"]].tolist()
+
+    # ---- Delete selected reviews ----
+    # An empty selection (rows unchecked, or the editor reset by a write) cancels
+    # any pending confirmation so the next tick starts from Delete Selected again
+    if "confirm_delete_selected" not in st.session_state or not selected_ids:
+        st.session_state.confirm_delete_selected = False
+
+    if st.button(
+        f"🗑️ Delete Selected ({len(selected_ids)}) / ఎంచుకున్నవాటిని తొలగించండి",
+        key="delete_selected_btn",
+        disabled=not selected_ids
+    ):
+        st.session_state.confirm_delete_selected = True
+
+    if st.session_state.confirm_delete_selected:
+        st.warning("Are you sure you want to delete the selected reviews? / మీరు నిజంగా ఎంచుకున్న సమీక్షలను తొలగించాలనుకుంటున్నారా?")
         c1, c2 = st.columns(2)
 
-        if c1.button("❌ Cancel / రద్దు చేయండి", key=f"{key_base}_cancel"):
-            st.session_state[key_base] = False
+        if c1.button("❌ Cancel / రద్దు చేయండి", key="delete_selected_cancel"):
+            st.session_state.confirm_delete_selected = False
             st.rerun()
 
-        if c2.button("✅ Yes, Delete / అవును, తొలగించండి", key=f"{key_base}_confirm"):
-            delete_review(rid)
-            st.session_state[key_base] = False
-            st.success("Review deleted. / సమీక్ష తొలగించబడింది.")
+        if c2.button("✅ Yes, Delete / అవును, తొలగించండి", key="delete_selected_confirm"):
+            delete_reviews(selected_ids)
+            st.session_state.confirm_delete_selected = False
+            st.success("Reviews deleted. / సమీక్షలు తొలగించబడ్డాయి.")
             st.rerun()
-
-    st.divider()
+else:
+    st.info("No reviews available. / సమీక్షలు అందుబాటులో లేవు.")